@@ -3,17 +3,18 @@
 
 import argparse
 import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 import numpy as np
 
-os.environ.setdefault("NUMBA_CACHE_DIR", str(Path(".numba_cache").resolve()))
-
-import librosa  # noqa: E402  # isort:skip
-
-from src.utils.analysis_utils import compressed_size_bytes, mean_std, rel_error
+from src.utils.analysis_utils import compressed_size_bytes, rel_error
+from src.utils.audio_utils import load_audio_cached
 from src.hr_mel import (
     DEFAULT_BANDS,
     DEFAULT_FMAX,
@@ -24,14 +25,21 @@ from src.hr_mel import (
     build_hr_mel_basis,
     decode_hr,
     encode_hr,
+    hr_mel_reconstruct,
+    power_spectrogram,
 )
-from src.utils.mel_utils import log_compress, log_decompress, mel_power
+from src.utils.mel_utils import log_compress, log_decompress, mel_basis, mel_pinv
 
 AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".m4a", ".aac"}
 
+# Thread-count variables read by OpenMP / OpenBLAS / MKL when NumPy loads them.
+BLAS_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Analyze STFT/Mel/HR-Mel representations.")
+# Row boundaries of the 80-bin mel / 96-bin mel / HR-Mel blocks in ``stacked_bases``.
+PROJECTION_SPLITS = [80, 80 + 96]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--input",
         type=Path,
@@ -43,6 +51,35 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--fmax", type=float, default=DEFAULT_FMAX, help="Upper frequency for Mel filters (Hz, clipped to Nyquist)"
     )
+    parser.add_argument(
+        "--device",
+        choices=["cpu", "cuda"],
+        default="cpu",
+        help="Run STFT + mel projections per file on CPU, or batched on GPU (requires PyTorch)",
+    )
+    parser.add_argument("--batch-size", type=int, default=8, help="Files per GPU batch with --device cuda")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes analyzing files in parallel on CPU (1 disables multiprocessing); "
+        "BLAS threads per process are capped so processes x threads stays within the CPU count",
+    )
+    parser.add_argument(
+        "--measure-sizes",
+        action="store_true",
+        help="Also measure the compressed size of the full STFT (slow; reported as null otherwise)",
+    )
+    parser.add_argument(
+        "--force-reload",
+        action="store_true",
+        help="Decode and resample inputs again, rewriting their <file>.sr<sr>.npy waveform caches",
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Analyze STFT/Mel/HR-Mel representations.")
+    add_arguments(parser)
     return parser.parse_args()
 
 
@@ -59,29 +96,145 @@ def collect_audio_files(input_path: Path) -> List[Path]:
     raise FileNotFoundError(f"Input path not found: {input_path}")
 
 
-def analyze_audio_file(input_path: Path, target_sr: int, fmax: float) -> Dict:
-    y, sr = librosa.load(input_path, sr=target_sr, mono=True)
+@lru_cache(maxsize=None)
+def stacked_bases(sr: int, fmax: float) -> np.ndarray:
+    """80-bin mel, 96-bin mel and HR-Mel bases stacked for one projection GEMM (cached, read-only)."""
+    hr_basis, _ = build_hr_mel_basis(sr, N_FFT, fmax, bands=DEFAULT_BANDS)
+    combined = np.vstack([mel_basis(sr, N_FFT, 80, fmax), mel_basis(sr, N_FFT, 96, fmax), hr_basis])
+    combined.setflags(write=False)
+    return combined
+
+
+@lru_cache(maxsize=None)
+def _stacked_bases_on_device(sr: int, fmax: float, device: str):
+    """``stacked_bases`` as a torch tensor on ``device``, copied there once per (sr, fmax, device)."""
+    import torch  # Optional dependency, only needed for --device cuda.
+
+    return torch.tensor(stacked_bases(sr, fmax), device=device)
+
+
+def analyze_audio_file(
+    input_path: Path, target_sr: int, fmax: float, measure_sizes: bool = False, force_reload: bool = False
+) -> Dict:
+    y, sr = load_audio_cached(input_path, target_sr, force_reload=force_reload)
+
+    stft_power = power_spectrogram(y)
+    # One GEMM reads stft_power once for all three projections.
+    mel_power_80, mel96_power, hr_mel_power = np.split(stacked_bases(sr, fmax) @ stft_power, PROJECTION_SPLITS)
+    return compare_representations(
+        input_path,
+        n_samples=len(y),
+        sr=sr,
+        fmax=fmax,
+        stft_power=stft_power,
+        mel_power_80=mel_power_80,
+        mel96_power=mel96_power,
+        hr_mel_power=hr_mel_power,
+        measure_sizes=measure_sizes,
+    )
 
-    stft_power = np.abs(
-        librosa.stft(y=y, n_fft=N_FFT, hop_length=HOP_LENGTH, win_length=WIN_LENGTH)
-    ) ** 2
 
+def analyze_audio_batch_torch(
+    input_paths: List[Path],
+    target_sr: int,
+    fmax: float,
+    device: str = "cuda",
+    measure_sizes: bool = False,
+    force_reload: bool = False,
+) -> List[Dict]:
+    """Batched STFT + mel projections on ``device`` via PyTorch; metrics stay on CPU."""
+    import torch  # Optional dependency, only needed for --device cuda.
+
+    waveforms = [load_audio_cached(p, target_sr, force_reload=force_reload)[0] for p in input_paths]
+    # Zero right-padding matches power_spectrogram's zero centre padding for every frame we keep.
+    batch = torch.zeros((len(waveforms), max(len(y) for y in waveforms)), device=device)
+    for i, y in enumerate(waveforms):
+        # Cached waveforms are read-only memory maps; torch.from_numpy needs a writable array.
+        batch[i, : len(y)] = torch.from_numpy(np.require(y, requirements="W"))
+
+    window = torch.hann_window(WIN_LENGTH, device=device)
+    stft = torch.stft(
+        batch,
+        n_fft=N_FFT,
+        hop_length=HOP_LENGTH,
+        win_length=WIN_LENGTH,
+        window=window,
+        center=True,
+        pad_mode="constant",
+        return_complex=True,
+    )
+    power = stft.abs().square_()
+    combined = _stacked_bases_on_device(target_sr, fmax, device)
+    projections = torch.tensor_split(torch.matmul(combined, power), PROJECTION_SPLITS, dim=1)
+
+    summaries = []
+    for i, (path, y) in enumerate(zip(input_paths, waveforms)):
+        frames = 1 + len(y) // HOP_LENGTH
+        mel_80, mel_96, hr = (p[i, :, :frames].contiguous().cpu().numpy() for p in projections)
+        summaries.append(
+            compare_representations(
+                path,
+                n_samples=len(y),
+                sr=target_sr,
+                fmax=fmax,
+                stft_power=power[i, :, :frames].contiguous().cpu().numpy(),
+                mel_power_80=mel_80,
+                mel96_power=mel_96,
+                hr_mel_power=hr,
+                measure_sizes=measure_sizes,
+            )
+        )
+    return summaries
+
+
+def _reconstruct(pinv: np.ndarray, values: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Non-negative ``pinv @ values``, written into ``out``."""
+    np.matmul(pinv, values, out=out)
+    return np.clip(out, 0, None, out=out)
+
+
+@contextmanager
+def blas_threads_env(n_threads: int) -> Iterator[None]:
+    """Temporarily set ``BLAS_THREAD_VARS`` so freshly spawned processes use ``n_threads`` BLAS threads."""
+    saved = {var: os.environ.get(var) for var in BLAS_THREAD_VARS}
+    os.environ.update({var: str(n_threads) for var in BLAS_THREAD_VARS})
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def compare_representations(
+    input_path: Path,
+    n_samples: int,
+    sr: int,
+    fmax: float,
+    stft_power: np.ndarray,
+    mel_power_80: np.ndarray,
+    mel96_power: np.ndarray,
+    hr_mel_power: np.ndarray,
+    measure_sizes: bool = False,
+) -> Dict:
     frames = stft_power.shape[1]
     results: Dict[str, Dict] = {}
+    # Each reconstruction is only needed for its rel_error, so they all share one buffer.
+    recon_buf = np.empty(stft_power.shape, dtype=np.float32)
 
-    # STFT baseline
+    # STFT baseline; compressing the full STFT dominates per-file cost, so it is opt-in.
     results["stft"] = {
         "bins": int(stft_power.shape[0]),
         "frames": int(frames),
         "relative_recon_error": 0.0,
-        "bytes_compressed": compressed_size_bytes(S=stft_power),
+        "bytes_compressed": compressed_size_bytes(S=stft_power) if measure_sizes else None,
     }
 
     # Standard Mel (power)
-    mel_basis = librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=80, fmax=fmax, norm="slaney")
-    mel_power_80 = mel_basis @ stft_power
-    mel_pinv = np.linalg.pinv(mel_basis)
-    mel_recon = np.maximum(mel_pinv @ mel_power_80, 0)
+    mel80_pinv = mel_pinv(sr, N_FFT, 80, fmax)
+    mel_recon = _reconstruct(mel80_pinv, mel_power_80, recon_buf)
     results["mel"] = {
         "bins": int(mel_power_80.shape[0]),
         "frames": int(mel_power_80.shape[1]),
@@ -93,7 +246,7 @@ def analyze_audio_file(input_path: Path, target_sr: int, fmax: float) -> Dict:
     # Log-Mel
     mel_log = log_compress(mel_power_80)
     mel_from_log = log_decompress(mel_log)
-    mel_log_recon = np.maximum(mel_pinv @ mel_from_log, 0)
+    mel_log_recon = _reconstruct(mel80_pinv, mel_from_log, recon_buf)
     results["log_mel"] = {
         "bins": int(mel_log.shape[0]),
         "frames": int(mel_log.shape[1]),
@@ -103,12 +256,8 @@ def analyze_audio_file(input_path: Path, target_sr: int, fmax: float) -> Dict:
     }
 
     # Uniform Mel with same bin count as HR (96 bins)
-    mel96_power, mel96_basis, mel96_pinv = mel_power(
-        stft_power, sr=sr, n_fft=N_FFT, n_mels=96, fmax=fmax
-    )
-    mel96_recon = np.maximum(mel96_pinv @ mel96_power, 0)
-    mel96_log = log_compress(mel96_power)
-    mel96_log_recon = np.maximum(mel96_pinv @ log_decompress(mel96_log), 0)
+    mel96_pinv = mel_pinv(sr, N_FFT, 96, fmax)
+    mel96_recon = _reconstruct(mel96_pinv, mel96_power, recon_buf)
     results["mel_96"] = {
         "bins": int(mel96_power.shape[0]),
         "frames": int(mel96_power.shape[1]),
@@ -116,6 +265,8 @@ def analyze_audio_file(input_path: Path, target_sr: int, fmax: float) -> Dict:
         "bytes_compressed": compressed_size_bytes(M=mel96_power),
         "note": "96-bin mel power (baseline to match HR bins)",
     }
+    mel96_log = log_compress(mel96_power)
+    mel96_log_recon = _reconstruct(mel96_pinv, log_decompress(mel96_log), recon_buf)
     results["log_mel_96"] = {
         "bins": int(mel96_log.shape[0]),
         "frames": int(mel96_log.shape[1]),
@@ -125,13 +276,11 @@ def analyze_audio_file(input_path: Path, target_sr: int, fmax: float) -> Dict:
     }
 
     # HR-Mel
-    hr_basis, hr_slices = build_hr_mel_basis(sr, N_FFT, fmax, bands=DEFAULT_BANDS)
-    hr_mel_power = hr_basis @ stft_power
+    _, hr_slices = build_hr_mel_basis(sr, N_FFT, fmax, bands=DEFAULT_BANDS)
     hr_encoded = encode_hr(hr_mel_power, hr_slices, bands=DEFAULT_BANDS)
     hr_decoded = decode_hr(hr_encoded, hr_slices, bands=DEFAULT_BANDS)
-    # Default rcond works well for these bases; tune rcond if experimenting with other configs.
-    hr_pinv = np.linalg.pinv(hr_basis)
-    hr_recon = np.maximum(hr_pinv @ hr_decoded, 0)
+    hr_recon = hr_mel_reconstruct(hr_decoded, sr, N_FFT, fmax, bands=DEFAULT_BANDS)
+    np.clip(hr_recon, 0, None, out=hr_recon)
     results["hr_mel"] = {
         "bins": int(hr_encoded.shape[0]),
         "frames": int(hr_encoded.shape[1]),
@@ -142,7 +291,7 @@ def analyze_audio_file(input_path: Path, target_sr: int, fmax: float) -> Dict:
 
     summary = {
         "input_sr": sr,
-        "duration_sec": round(len(y) / sr, 2),
+        "duration_sec": round(n_samples / sr, 2),
         "frames": int(frames),
         "n_fft": N_FFT,
         "hop_length": HOP_LENGTH,
@@ -156,24 +305,33 @@ def analyze_audio_file(input_path: Path, target_sr: int, fmax: float) -> Dict:
 
 
 def aggregate_results(per_file: List[Dict]) -> Dict:
+    sample = per_file[0]["representations"]
+    numeric = [
+        (rep, key)
+        for rep, rep_sample in sample.items()
+        for key, value in rep_sample.items()
+        if isinstance(value, (int, float))
+    ]
+    # One (files x metrics) array, reduced column-wise in two passes.
+    table = np.array(
+        [
+            [f["duration_sec"], f["frames"]] + [f["representations"][rep][key] for rep, key in numeric]
+            for f in per_file
+        ],
+        dtype=float,
+    )
+    stats = iter([{"mean": float(m), "std": float(s)} for m, s in zip(table.mean(axis=0), table.std(axis=0))])
+
     aggregate = {
         "file_count": len(per_file),
-        "duration_sec": mean_std(f["duration_sec"] for f in per_file),
-        "frames": mean_std(f["frames"] for f in per_file),
+        "duration_sec": next(stats),
+        "frames": next(stats),
         "representations": {},
     }
-
-    rep_names = per_file[0]["representations"].keys()
-    for rep in rep_names:
-        sample = per_file[0]["representations"][rep]
-        rep_stats: Dict[str, Dict] = {}
-        for key, value in sample.items():
-            if isinstance(value, (int, float)):
-                values = [f["representations"][rep][key] for f in per_file]
-                rep_stats[key] = mean_std(values)
-            else:
-                rep_stats[key] = value
-        aggregate["representations"][rep] = rep_stats
+    for rep, rep_sample in sample.items():
+        aggregate["representations"][rep] = {
+            key: next(stats) if isinstance(value, (int, float)) else value for key, value in rep_sample.items()
+        }
 
     return aggregate
 
@@ -187,7 +345,40 @@ def main(args: argparse.Namespace) -> None:
     audio_files = collect_audio_files(input_path)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    per_file = [analyze_audio_file(audio_file, target_sr, fmax) for audio_file in audio_files]
+    if args.device == "cuda":
+        per_file = []
+        for start in range(0, len(audio_files), args.batch_size):
+            batch = audio_files[start : start + args.batch_size]
+            per_file.extend(
+                analyze_audio_batch_torch(
+                    batch,
+                    target_sr,
+                    fmax,
+                    device=args.device,
+                    measure_sizes=args.measure_sizes,
+                    force_reload=args.force_reload,
+                )
+            )
+    else:
+        analyze = partial(
+            analyze_audio_file,
+            target_sr=target_sr,
+            fmax=fmax,
+            measure_sizes=args.measure_sizes,
+            force_reload=args.force_reload,
+        )
+        if args.workers > 1 and len(audio_files) > 1:
+            workers = min(args.workers, len(audio_files))
+            # BLAS reads its thread count when loaded, so workers are spawned (not forked from this
+            # already-initialised process) with the limit in their environment.
+            # Each worker builds the 80/96-bin mel pinvs (one SVD each) and the HR Gram Cholesky
+            # factor once; only the HR basis comes from the shipped npz.
+            with blas_threads_env(max(1, (os.cpu_count() or 1) // workers)), ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                per_file = list(pool.map(analyze, audio_files))
+        else:
+            per_file = [analyze(audio_file) for audio_file in audio_files]
     aggregate = aggregate_results(per_file)
 
     report = {
@@ -197,6 +388,8 @@ def main(args: argparse.Namespace) -> None:
             "n_fft": N_FFT,
             "hop_length": HOP_LENGTH,
             "win_length": WIN_LENGTH,
+            "device": args.device,
+            "measure_sizes": args.measure_sizes,
         },
         "audio_files": [str(p) for p in audio_files],
         "per_file": per_file,
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Single entry point for the HR-Mel command line tools (``analyze`` and ``generate``)."""
+
+import argparse
+
+from src import analyze_features, generate_mel_variants
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="HR-Mel command line tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    analyze = subparsers.add_parser("analyze", help="Analyze STFT/Mel/HR-Mel representations.")
+    analyze_features.add_arguments(analyze)
+    analyze.set_defaults(run=analyze_features.main)
+
+    generate = subparsers.add_parser("generate", help="Extract HR-Mel features.")
+    generate_mel_variants.add_arguments(generate)
+    generate.set_defaults(run=generate_mel_variants.main)
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> None:
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -3,17 +3,9 @@
 
 import argparse
 import json
-import os
 from pathlib import Path
 from typing import Dict
 
-import numpy as np
-
-# Ensure numba cache has a writable home before importing librosa.
-os.environ.setdefault("NUMBA_CACHE_DIR", str(Path(".numba_cache").resolve()))
-
-import librosa  # noqa: E402  # isort:skip
-
 from src.hr_mel import (
     DEFAULT_BANDS,
     DEFAULT_FMAX,
@@ -24,10 +16,10 @@ from src.hr_mel import (
     hr_mel,
     save_hr_mel,
 )
+from src.utils.audio_utils import load_audio
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Extract HR-Mel features.")
+def add_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--input", type=Path, default=Path("playlist.mp3"), help="Input audio file")
     parser.add_argument("--output-dir", type=Path, default=Path("output"), help="Directory for outputs")
     parser.add_argument("--sr", type=int, default=DEFAULT_SR, help="Target sample rate (Hz)")
@@ -37,6 +29,17 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_FMAX,
         help="Upper frequency for Mel filters (Hz, clipped to Nyquist)",
     )
+    parser.add_argument(
+        "--storage",
+        choices=["float32", "float16", "int8"],
+        default="float16",
+        help="On-disk dtype for hr_mel.npz (int8 uses a per-band scale stored in meta)",
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract HR-Mel features.")
+    add_arguments(parser)
     return parser.parse_args()
 
 
@@ -50,15 +53,16 @@ def main(args: argparse.Namespace) -> None:
 
     fmax = min(args.fmax, target_sr / 2.0)
     out_dir.mkdir(parents=True, exist_ok=True)
-    y, sr = librosa.load(input_path, sr=target_sr, mono=True)
+    y, sr = load_audio(input_path, target_sr)
 
     hr_encoded, hr_meta = hr_mel(y, sr, fmax=fmax, bands=DEFAULT_BANDS)
-    save_hr_mel(hr_encoded, hr_meta, out_path=out_dir / "hr_mel.npz")
+    save_hr_mel(hr_encoded, hr_meta, out_path=out_dir / "hr_mel.npz", storage=args.storage)
     summary = {
         "input_sr": sr,
         "duration_sec": round(len(y) / sr, 2),
         "hr_mel_encoded": list(hr_encoded.shape),
         "bands": hr_meta["bands"],
+        "storage": args.storage,
         "n_fft": N_FFT,
         "hop_length": HOP_LENGTH,
         "win_length": WIN_LENGTH,
@@ -2,11 +2,16 @@
 """HR-Mel utilities: basis construction, encoding/decoding, and extraction."""
 
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
-import librosa
+import scipy.fft
+import scipy.linalg
+import scipy.sparse
+
+from src.utils.mel_utils import make_mel_filters
 
 # Default configuration (44.1 kHz spec).
 DEFAULT_SR = 44_100
@@ -24,11 +29,30 @@ DEFAULT_BANDS: List[Dict] = [
 
 VALID_COMPRESSIONS = {"log1p", "sqrt_log1p", "pow075"}
 
+# Per-row compression codes, so encode_hr / decode_hr dispatch with masks instead of strings.
+# PASSTHROUGH marks rows outside every band slice, which are copied unchanged.
+LOG1P, SQRT_LOG1P, POW075 = 0, 1, 2
+PASSTHROUGH = -1
+COMPRESSION_CODES = {"log1p": LOG1P, "sqrt_log1p": SQRT_LOG1P, "pow075": POW075}
 
-def build_hr_mel_basis(
+# Basis for the default spec, generated by src/hr_mel_precompute.py.
+PRECOMPUTED_BASIS_PATH = Path(__file__).resolve().parent / "data" / "hr_basis_44k.npz"
+
+
+BandsKey = Tuple[Tuple[float, float, int, str], ...]
+
+
+def _bands_key(bands: Sequence[Dict]) -> BandsKey:
+    """Hashable form of ``bands`` for keying the basis caches."""
+    return tuple(
+        (float(b["fmin"]), float(b["fmax"]), int(b["bins"]), str(b["compression"])) for b in bands
+    )
+
+
+def compute_hr_mel_basis(
     sr: int, n_fft: int, fmax: float, bands: Sequence[Dict] = DEFAULT_BANDS
 ) -> Tuple[np.ndarray, List[slice]]:
-    """Create custom mel basis for HR-Mel."""
+    """Build the HR-Mel basis from Slaney mel filters, bypassing all caches."""
     bases: List[np.ndarray] = []
     slices: List[slice] = []
     start = 0
@@ -36,9 +60,7 @@ def build_hr_mel_basis(
         bins = int(band["bins"])
         fmin = float(band["fmin"])
         fmax_band = min(float(band["fmax"]), fmax)
-        basis = librosa.filters.mel(
-            sr=sr, n_fft=n_fft, n_mels=bins, fmin=fmin, fmax=fmax_band, norm="slaney"
-        )
+        basis = make_mel_filters(sr, n_fft, bins, fmin=fmin, fmax=fmax_band, norm="slaney")
         bases.append(basis)
         end = start + bins
         slices.append(slice(start, end))
@@ -46,6 +68,147 @@ def build_hr_mel_basis(
     return np.vstack(bases), slices
 
 
+def compute_hr_mel_pinv(basis: np.ndarray) -> np.ndarray:
+    """Pseudo-inverse of an HR-Mel basis, bypassing all caches."""
+    # Default rcond works well for these bases; tune rcond if experimenting with other configs.
+    return np.linalg.pinv(basis)
+
+
+def _spec_key(sr: int, n_fft: int, fmax: float, bands_key: BandsKey) -> str:
+    return json.dumps([int(sr), int(n_fft), float(fmax), [list(b) for b in bands_key]])
+
+
+def precomputed_key(sr: int, n_fft: int, fmax: float, bands: Sequence[Dict]) -> str:
+    """Identify the spec a precomputed basis file was generated for."""
+    return _spec_key(sr, n_fft, fmax, _bands_key(bands))
+
+
+@lru_cache(maxsize=None)
+def _load_precomputed(path: Path) -> Optional[Dict[str, np.ndarray]]:
+    if not path.exists():
+        return None
+    # mmap_mode is not honoured for .npz archives, so the (small) arrays are read eagerly once.
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _precomputed(sr: int, n_fft: int, fmax: float, bands_key: BandsKey) -> Optional[Dict[str, np.ndarray]]:
+    data = _load_precomputed(PRECOMPUTED_BASIS_PATH)
+    if data is None:
+        return None
+    if str(data["key"]) != _spec_key(sr, n_fft, fmax, bands_key):
+        return None
+    return data
+
+
+def _bands_from_key(bands_key: BandsKey) -> List[Dict]:
+    return [dict(zip(("fmin", "fmax", "bins", "compression"), b)) for b in bands_key]
+
+
+@lru_cache(maxsize=None)
+def _cached_hr_mel_basis(
+    sr: int, n_fft: int, fmax: float, bands_key: BandsKey
+) -> Tuple[np.ndarray, Tuple[slice, ...]]:
+    data = _precomputed(sr, n_fft, fmax, bands_key)
+    if data is not None:
+        basis = data["basis"]
+        slices = [slice(int(start), int(stop)) for start, stop in data["slices"]]
+    else:
+        basis, slices = compute_hr_mel_basis(sr, n_fft, fmax, _bands_from_key(bands_key))
+    basis.setflags(write=False)
+    return basis, tuple(slices)
+
+
+@lru_cache(maxsize=None)
+def _cached_hr_mel_pinv(sr: int, n_fft: int, fmax: float, bands_key: BandsKey) -> np.ndarray:
+    # Only reached via hr_mel_pinv() or a rank-deficient basis, so it is computed, not shipped.
+    basis, _ = _cached_hr_mel_basis(sr, n_fft, fmax, bands_key)
+    pinv = compute_hr_mel_pinv(basis)
+    pinv.setflags(write=False)
+    return pinv
+
+
+@lru_cache(maxsize=None)
+def _cached_hr_mel_gram(
+    sr: int, n_fft: int, fmax: float, bands_key: BandsKey
+) -> Tuple[scipy.sparse.csr_matrix, Optional[np.ndarray]]:
+    basis, _ = _cached_hr_mel_basis(sr, n_fft, fmax, bands_key)
+    basis_csr = scipy.sparse.csr_matrix(basis)
+    gram = (basis_csr.astype(np.float64) @ basis_csr.T.astype(np.float64)).toarray()
+    rows, cols = np.nonzero(gram)
+    bandwidth = int(np.max(np.abs(rows - cols)))
+    # Upper banded storage: ab[bandwidth + i - j, j] = gram[i, j].
+    ab = np.zeros((bandwidth + 1, gram.shape[0]))
+    for offset in range(bandwidth + 1):
+        ab[bandwidth - offset, offset:] = np.diagonal(gram, offset)
+    try:
+        chol = scipy.linalg.cholesky_banded(ab)
+    except np.linalg.LinAlgError:
+        # Rank-deficient basis (e.g. empty filters): hr_mel_reconstruct falls back to pinv.
+        chol = None
+    return basis_csr, chol
+
+
+@lru_cache(maxsize=None)
+def _cached_compression_codes(
+    slices_key: Tuple[Tuple[int, int], ...], bands_key: BandsKey, n_rows: int
+) -> np.ndarray:
+    codes = np.full(n_rows, PASSTHROUGH, dtype=np.int8)
+    for (start, stop), (*_, compression) in zip(slices_key, bands_key):
+        if compression not in COMPRESSION_CODES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        codes[start:stop] = COMPRESSION_CODES[compression]
+    codes.setflags(write=False)
+    return codes
+
+
+def compression_codes(slices: Sequence[slice], bands: Sequence[Dict], n_rows: int) -> np.ndarray:
+    """Per-row compression code (``COMPRESSION_CODES``) for ``n_rows`` rows laid out by ``slices``.
+
+    Rows outside every slice get ``PASSTHROUGH`` and are left unchanged by ``encode_hr`` /
+    ``decode_hr``.
+    """
+    slices_key = tuple(sl.indices(n_rows)[:2] for sl in slices)
+    return _cached_compression_codes(slices_key, _bands_key(bands), int(n_rows))
+
+
+def _broadcast_rows(codes: np.ndarray, ndim: int) -> np.ndarray:
+    # Row codes shaped to broadcast over (n_rows, ...) inputs of any rank, including 1-D frames.
+    return codes.reshape((-1,) + (1,) * (ndim - 1))
+
+
+def build_hr_mel_basis(
+    sr: int, n_fft: int, fmax: float, bands: Sequence[Dict] = DEFAULT_BANDS
+) -> Tuple[np.ndarray, List[slice]]:
+    """Create custom mel basis for HR-Mel (cached and read-only)."""
+    basis, slices = _cached_hr_mel_basis(sr, n_fft, fmax, _bands_key(bands))
+    return basis, list(slices)
+
+
+def hr_mel_pinv(
+    sr: int, n_fft: int, fmax: float, bands: Sequence[Dict] = DEFAULT_BANDS
+) -> np.ndarray:
+    """Pseudo-inverse of the HR-Mel basis (cached and read-only)."""
+    return _cached_hr_mel_pinv(sr, n_fft, fmax, _bands_key(bands))
+
+
+def hr_mel_reconstruct(
+    decoded: np.ndarray, sr: int, n_fft: int, fmax: float, bands: Sequence[Dict] = DEFAULT_BANDS
+) -> np.ndarray:
+    """Minimum-norm STFT power for decoded HR-Mel power, i.e. ``hr_mel_pinv(...) @ decoded``.
+
+    For a full-row-rank basis B this is ``B.T @ solve(B @ B.T, decoded)``; the Gram matrix is
+    banded (neighbouring filters only overlap), so it is solved with a banded Cholesky factor
+    and the sparse basis instead of a dense SVD-based pseudo-inverse.
+    """
+    bands_key = _bands_key(bands)
+    basis_csr, chol = _cached_hr_mel_gram(sr, n_fft, fmax, bands_key)
+    if chol is None:
+        return _cached_hr_mel_pinv(sr, n_fft, fmax, bands_key) @ decoded
+    coeffs = scipy.linalg.cho_solve_banded((chol, False), decoded)
+    return np.asarray(basis_csr.T @ coeffs.astype(decoded.dtype, copy=False))
+
+
 def encode_band(values: np.ndarray, compression: str) -> np.ndarray:
     if compression == "log1p":
         return np.log1p(values)
@@ -67,31 +230,73 @@ def decode_band(values: np.ndarray, compression: str) -> np.ndarray:
 
 
 def encode_hr(power: np.ndarray, slices: List[slice], bands: Sequence[Dict]) -> np.ndarray:
-    encoded = power.copy()
-    for band, sl in zip(bands, slices):
-        encoded[sl] = encode_band(encoded[sl], band["compression"])
+    """Apply each band's compression to the rows ``slices`` assigns it (rows are axis 0)."""
+    codes = _broadcast_rows(compression_codes(slices, bands, power.shape[0]), power.ndim)
+    pow_rows = codes == POW075
+    encoded = np.empty_like(power)
+    if pow_rows.any():
+        np.log1p(power, out=encoded, where=~pow_rows)
+        np.power(power, 0.75, out=encoded, where=pow_rows)
+    else:
+        np.log1p(power, out=encoded)
+    np.sqrt(encoded, out=encoded, where=codes == SQRT_LOG1P)
+    passthrough = codes == PASSTHROUGH
+    if passthrough.any():
+        np.copyto(encoded, power, where=passthrough)
     return encoded
 
 
 def decode_hr(encoded: np.ndarray, slices: List[slice], bands: Sequence[Dict]) -> np.ndarray:
-    decoded = encoded.copy()
-    for band, sl in zip(bands, slices):
-        decoded[sl] = decode_band(decoded[sl], band["compression"])
+    """Invert ``encode_hr``."""
+    codes = _broadcast_rows(compression_codes(slices, bands, encoded.shape[0]), encoded.ndim)
+    sqrt_rows = codes == SQRT_LOG1P
+    decoded = np.empty_like(encoded)
+    np.square(encoded, out=decoded, where=sqrt_rows)
+    np.expm1(decoded, out=decoded, where=sqrt_rows)
+    np.expm1(encoded, out=decoded, where=codes == LOG1P)
+    pow_rows = codes == POW075
+    if pow_rows.any():
+        np.power(encoded, 1 / 0.75, out=decoded, where=pow_rows)
+    passthrough = codes == PASSTHROUGH
+    if passthrough.any():
+        np.copyto(decoded, encoded, where=passthrough)
     return decoded
 
 
+def _periodic_hann(length: int) -> np.ndarray:
+    # Same as scipy.signal.get_window("hann", length), without importing scipy.signal.
+    window = (0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(length) / length)).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+
+# The STFT settings are fixed, so the analysis window is built once at import.
+_WINDOW = _periodic_hann(WIN_LENGTH)
+
+
+def power_spectrogram(y: np.ndarray) -> np.ndarray:
+    """Float32 STFT power ``|STFT(y)|**2`` with the HR-Mel STFT settings.
+
+    Matches ``librosa.stft`` defaults: periodic Hann window, centred frames, zero padding.
+    """
+    padded = np.pad(np.asarray(y, dtype=np.float32), N_FFT // 2)
+    frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT)[::HOP_LENGTH]
+    # The windowed frames are a fresh temporary, so the FFT may reuse them as scratch.
+    stft = scipy.fft.rfft(frames * _WINDOW, axis=1, overwrite_x=True)
+    # Magnitude and square in one float32 buffer, without extra full-size temporaries.
+    power = np.abs(stft, out=np.empty(stft.shape, dtype=np.float32))
+    return np.square(power, out=power).T
+
+
 def hr_mel(
     y: np.ndarray,
     sr: int,
     fmax: float = DEFAULT_FMAX,
     bands: Sequence[Dict] = DEFAULT_BANDS,
 ) -> Tuple[np.ndarray, Dict]:
-    power_spec = np.abs(
-        librosa.stft(y=y, n_fft=N_FFT, hop_length=HOP_LENGTH, win_length=WIN_LENGTH)
-    ) ** 2
+    power_spec = power_spectrogram(y)
     basis, band_slices = build_hr_mel_basis(sr, N_FFT, fmax, bands=bands)
-    mel = basis @ power_spec
-    encoded = encode_hr(mel, band_slices, bands)
+    encoded = encode_hr(basis @ power_spec, band_slices, bands)
     meta = {
         "n_fft": N_FFT,
         "hop_length": HOP_LENGTH,
@@ -107,7 +312,36 @@ def hr_mel(
     return encoded, meta
 
 
-def save_hr_mel(encoded: np.ndarray, meta: Dict, out_path: Path) -> None:
+def save_hr_mel(encoded: np.ndarray, meta: Dict, out_path: Path, storage: str = "float16") -> None:
+    """Save encoded HR-Mel as ``storage`` (float32, float16, or per-band scaled int8)."""
+    meta = dict(meta)
+    if storage == "int8":
+        bins = [int(b["bins"]) for b in meta["bands"]]
+        bounds = np.cumsum([0] + bins)
+        scales = [
+            127.0 / max(float(np.max(encoded[start:stop], initial=0.0)), 1e-12)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        row_scale = np.repeat(np.asarray(scales, dtype=np.float32), bins)[:, None]
+        stored = np.clip(np.rint(encoded * row_scale), -127, 127).astype(np.int8)
+        meta["quantization"] = {"dtype": "int8", "scales": scales}
+    elif storage in ("float32", "float16"):
+        stored = encoded.astype(storage)
+        meta["quantization"] = {"dtype": storage}
+    else:
+        raise ValueError(f"Unsupported storage dtype: {storage}")
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    np.savez_compressed(out_path, encoded=encoded, meta=json.dumps(meta))
+    np.savez_compressed(out_path, encoded=stored, meta=json.dumps(meta))
+
 
+def load_hr_mel(path: Path) -> Tuple[np.ndarray, Dict]:
+    """Load a ``save_hr_mel`` file, returning float32 encoded HR-Mel and its meta."""
+    with np.load(path) as data:
+        stored = data["encoded"]
+        meta = json.loads(str(data["meta"]))
+    quantization = meta.get("quantization", {"dtype": str(stored.dtype)})
+    encoded = stored.astype(np.float32)
+    if quantization["dtype"] == "int8":
+        bins = [int(b["bins"]) for b in meta["bands"]]
+        encoded /= np.repeat(np.asarray(quantization["scales"], dtype=np.float32), bins)[:, None]
+    return encoded, meta
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Precompute the default HR-Mel basis into an npz shipped with the package."""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from src.hr_mel import (
+    DEFAULT_BANDS,
+    DEFAULT_FMAX,
+    DEFAULT_SR,
+    N_FFT,
+    PRECOMPUTED_BASIS_PATH,
+    compute_hr_mel_basis,
+    precomputed_key,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Precompute the default HR-Mel basis.")
+    parser.add_argument("--output", type=Path, default=PRECOMPUTED_BASIS_PATH, help="Destination npz file")
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> None:
+    out_path: Path = args.output
+    basis, slices = compute_hr_mel_basis(DEFAULT_SR, N_FFT, DEFAULT_FMAX, bands=DEFAULT_BANDS)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        out_path,
+        basis=basis,
+        slices=np.array([[sl.start, sl.stop] for sl in slices], dtype=np.int64),
+        key=precomputed_key(DEFAULT_SR, N_FFT, DEFAULT_FMAX, DEFAULT_BANDS),
+    )
+    print(f"Saved {basis.shape[0]}x{basis.shape[1]} basis to {out_path}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -13,11 +13,46 @@ def rel_error(target: np.ndarray, approx: np.ndarray) -> float:
     return float(np.linalg.norm(target - approx, "fro") / denom)
 
 
+class _ByteCounter:
+    """Write-only file object that tracks its size instead of keeping the bytes.
+
+    Seeking is supported so zipfile rewrites local headers in place (as it does for a real file)
+    rather than appending data descriptors; the count then matches the actual npz size.
+    """
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        # Only present because np.savez treats objects with ``read`` as file-like.
+        raise io.UnsupportedOperation("read")
+
+    def write(self, data: bytes) -> int:
+        self.pos += len(data)
+        self.n = max(self.n, self.pos)
+        return len(data)
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.n}[whence]
+        self.pos = base + offset
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self) -> None:
+        pass
+
+
 def compressed_size_bytes(**arrays: np.ndarray) -> int:
     """Return size in bytes of a compressed npz containing the provided arrays."""
-    buf = io.BytesIO()
-    np.savez_compressed(buf, **arrays)
-    return len(buf.getvalue())
+    sink = _ByteCounter()
+    np.savez_compressed(sink, **arrays)
+    return sink.n
 
 
 def mean_std(values: Iterable[float]) -> dict:
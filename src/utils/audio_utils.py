@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Audio loading helpers (decode, downmix, resample) without librosa."""
+
+import os
+from math import gcd
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import soundfile as sf
+
+try:
+    import soxr  # Same resampler librosa uses by default; optional.
+except ImportError:
+    soxr = None
+
+
+def _decode(path: Path) -> Tuple[np.ndarray, int]:
+    try:
+        data, sr = sf.read(path, dtype="float32", always_2d=True)
+    except sf.LibsndfileError:
+        # Containers libsndfile cannot decode (e.g. m4a/aac) go through librosa's audioread
+        # backend when it is installed; librosa is otherwise not required.
+        try:
+            import librosa
+        except ImportError:
+            raise RuntimeError(f"Cannot decode {path} without librosa/audioread installed") from None
+        y, sr = librosa.load(path, sr=None, mono=True, dtype=np.float32)
+        return y, int(sr)
+    return data.mean(axis=1, dtype=np.float32), int(sr)
+
+
+def load_audio(path: Path, sr: int) -> Tuple[np.ndarray, int]:
+    """Load ``path`` as mono float32 at ``sr`` Hz, resampling with soxr (or polyphase) when needed."""
+    y, native_sr = _decode(path)
+    if native_sr != sr and soxr is not None:
+        y = soxr.resample(y, native_sr, sr, quality="soxr_hq")
+    elif native_sr != sr:
+        from scipy.signal import resample_poly
+
+        g = gcd(native_sr, sr)
+        y = resample_poly(y, sr // g, native_sr // g).astype(np.float32, copy=False)
+    return y, sr
+
+
+def resampled_cache_path(path: Path, sr: int) -> Path:
+    """Sidecar ``<path>.sr<sr>.npy`` holding the resampled waveform of ``path``."""
+    return path.with_name(f"{path.name}.sr{sr}.npy")
+
+
+def load_audio_cached(path: Path, sr: int, force_reload: bool = False) -> Tuple[np.ndarray, int]:
+    """``load_audio`` backed by a sidecar ``.npy`` cache, memory-mapped read-only when fresh.
+
+    The sidecar is (re)written when missing, older than ``path``, or ``force_reload`` is set;
+    if it cannot be written (e.g. a read-only dataset), the decoded waveform is used uncached.
+    """
+    cache_path = resampled_cache_path(path, sr)
+    if not force_reload and cache_path.exists() and cache_path.stat().st_mtime >= path.stat().st_mtime:
+        return np.load(cache_path, mmap_mode="r"), sr
+    y, sr = load_audio(path, sr)
+    # Write then rename, so concurrent runs never see a partially written sidecar.
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            np.save(f, y)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+    return y, sr
@@ -1,10 +1,81 @@
 #!/usr/bin/env python3
 """Standard Mel and Log-Mel helpers."""
 
-from typing import Tuple
+import warnings
+from functools import lru_cache
+from typing import Optional, Tuple
 
 import numpy as np
-import librosa
+
+# Slaney mel scale: linear below 1 kHz, logarithmic above (matches librosa's htk=False).
+_F_SP = 200.0 / 3
+_MIN_LOG_HZ = 1_000.0
+_MIN_LOG_MEL = _MIN_LOG_HZ / _F_SP
+_LOGSTEP = np.log(6.4) / 27.0
+
+
+def hz_to_mel(frequencies: np.ndarray) -> np.ndarray:
+    frequencies = np.asanyarray(frequencies, dtype=float)
+    linear = frequencies / _F_SP
+    log = _MIN_LOG_MEL + np.log(np.maximum(frequencies, _MIN_LOG_HZ) / _MIN_LOG_HZ) / _LOGSTEP
+    return np.where(frequencies >= _MIN_LOG_HZ, log, linear)
+
+
+def mel_to_hz(mels: np.ndarray) -> np.ndarray:
+    mels = np.asanyarray(mels, dtype=float)
+    linear = _F_SP * mels
+    log = _MIN_LOG_HZ * np.exp(_LOGSTEP * (mels - _MIN_LOG_MEL))
+    return np.where(mels >= _MIN_LOG_MEL, log, linear)
+
+
+def make_mel_filters(
+    sr: int,
+    n_fft: int,
+    n_mels: int,
+    fmin: float = 0.0,
+    fmax: Optional[float] = None,
+    norm: Optional[str] = "slaney",
+) -> np.ndarray:
+    """Triangular mel filterbank, equivalent to ``librosa.filters.mel(htk=False)``."""
+    if fmax is None:
+        fmax = float(sr) / 2
+    if norm not in ("slaney", None):
+        raise ValueError(f"Unsupported norm: {norm}")
+
+    fftfreqs = np.fft.rfftfreq(n=n_fft, d=1.0 / sr)
+    mel_f = mel_to_hz(np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2))
+    fdiff = np.diff(mel_f)
+    ramps = np.subtract.outer(mel_f, fftfreqs)
+
+    lower = -ramps[:-2] / fdiff[:-1, None]
+    upper = ramps[2:] / fdiff[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper)).astype(np.float32)
+    if norm == "slaney":
+        # Constant energy per channel.
+        weights *= (2.0 / (mel_f[2 : n_mels + 2] - mel_f[:n_mels]))[:, None]
+
+    if not np.all((mel_f[:-2] == 0) | (weights.max(axis=1) > 0)):
+        warnings.warn(
+            f"Empty filters detected in mel frequency basis; try fewer than n_mels={n_mels} filters.",
+            stacklevel=2,
+        )
+    return weights
+
+
+@lru_cache(maxsize=None)
+def mel_basis(sr: int, n_fft: int, n_mels: int, fmax: float, norm: str = "slaney") -> np.ndarray:
+    """Return a cached, read-only mel filterbank."""
+    basis = make_mel_filters(sr, n_fft, n_mels, fmax=fmax, norm=norm)
+    basis.setflags(write=False)
+    return basis
+
+
+@lru_cache(maxsize=None)
+def mel_pinv(sr: int, n_fft: int, n_mels: int, fmax: float, norm: str = "slaney") -> np.ndarray:
+    """Return the cached, read-only pseudo-inverse of ``mel_basis``."""
+    pinv = np.linalg.pinv(mel_basis(sr, n_fft, n_mels, fmax, norm))
+    pinv.setflags(write=False)
+    return pinv
 
 
 def mel_power(
@@ -15,9 +86,9 @@ def mel_power(
     fmax: float,
     norm: str = "slaney",
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-    basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmax=fmax, norm=norm)
+    basis = mel_basis(sr, n_fft, n_mels, fmax, norm)
     mel = basis @ stft_power
-    pinv = np.linalg.pinv(basis)
+    pinv = mel_pinv(sr, n_fft, n_mels, fmax, norm)
     return mel, basis, pinv
 
 